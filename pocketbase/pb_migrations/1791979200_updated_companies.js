@@ -0,0 +1,46 @@
+/// <reference path="../pb_data/types.d.ts" />
+migrate((db) => {
+  const dao = new Dao(db)
+  const collection = dao.findCollectionByNameOrId("kaszjfi1uzdfexg")
+
+  // add
+  collection.schema.addField(new SchemaField({
+    "system": false,
+    "id": "c4chttl1",
+    "name": "cache_ttl",
+    "type": "number",
+    "required": false,
+    "presentable": false,
+    "unique": false,
+    "options": {
+      "min": 0,
+      "max": null,
+      "noDecimal": true
+    }
+  }))
+
+  // add
+  collection.schema.addField(new SchemaField({
+    "system": false,
+    "id": "n0c4che1",
+    "name": "disable_cache",
+    "type": "bool",
+    "required": false,
+    "presentable": false,
+    "unique": false,
+    "options": {}
+  }))
+
+  return dao.saveCollection(collection)
+}, (db) => {
+  const dao = new Dao(db)
+  const collection = dao.findCollectionByNameOrId("kaszjfi1uzdfexg")
+
+  // remove
+  collection.schema.removeField("c4chttl1")
+
+  // remove
+  collection.schema.removeField("n0c4che1")
+
+  return dao.saveCollection(collection)
+})
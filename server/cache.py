@@ -0,0 +1,151 @@
+from sentence_transformers import SentenceTransformer
+from typing import Optional
+import hashlib
+import os
+import sqlite3
+import sqlite_vec
+import threading
+import time
+
+# Default lifetime of a cached reply, can be overridden per company
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 24 * 60 * 60))
+RESPONSE_CACHE_THRESHOLD = 0.92
+
+
+class SemanticCache:
+    """Two-tier cache of assistant replies keyed by assistant ID.
+
+    Prompts are first looked up by their exact SHA-256 hash, then by the cosine
+    similarity of their embedding against previously answered prompts.
+
+    Methods block on SQLite and the embedding model, call them from a worker
+    thread when serving requests.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(os.getcwd(), "cache", "responses.db"),
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        threshold: float = RESPONSE_CACHE_THRESHOLD,
+    ):
+        """
+        Args:
+            path (str): Path to the SQLite database backing the cache.
+            model_name (str): Sentence Transformers model used to embed prompts.
+            threshold (float): Minimum cosine similarity for a semantic hit.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.model_name = model_name
+        self.threshold = threshold
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.enable_load_extension(True)
+        sqlite_vec.load(self.db)
+        self.db.enable_load_extension(False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                assistant_id TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                reply TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (assistant_id, prompt_hash)
+            )
+            """)
+        self.db.commit()
+
+    def _embed(self, prompt: str) -> bytes:
+        # Loading the model is slow, only pay for it on first use
+        with self._model_lock:
+            if self._model is None:
+                self._model = SentenceTransformer(self.model_name)
+        embedding = self._model.encode(prompt, normalize_embeddings=True)
+        return sqlite_vec.serialize_float32(embedding.tolist())
+
+    @staticmethod
+    def _hash(prompt: str) -> str:
+        return hashlib.sha256(" ".join(prompt.lower().split()).encode()).hexdigest()
+
+    def get(
+        self, assistant_id: str, prompt: str
+    ) -> tuple[Optional[str], Optional[bytes]]:
+        """Return the cached reply for a prompt, if any.
+
+        Args:
+            assistant_id (str): Assistant the prompt was asked to.
+            prompt (str): Question asked by the user.
+
+        Returns:
+            tuple[Optional[str], Optional[bytes]]: Cached reply, or None on a cache
+                miss, and the prompt embedding if one was computed so it can be
+                passed on to put.
+        """
+        now = time.time()
+        with self._db_lock:
+            row = self.db.execute(
+                "SELECT reply FROM responses WHERE assistant_id = ? AND prompt_hash = ? AND expires_at > ?",
+                (assistant_id, self._hash(prompt), now),
+            ).fetchone()
+        if row:
+            return row[0], None
+
+        embedding = self._embed(prompt)
+        with self._db_lock:
+            row = self.db.execute(
+                """
+                SELECT reply, vec_distance_cosine(embedding, ?) AS distance
+                FROM responses
+                WHERE assistant_id = ? AND expires_at > ?
+                ORDER BY distance
+                LIMIT 1
+                """,
+                (embedding, assistant_id, now),
+            ).fetchone()
+        if row and 1 - row[1] >= self.threshold:
+            return row[0], embedding
+        return None, embedding
+
+    def put(
+        self,
+        assistant_id: str,
+        prompt: str,
+        reply: str,
+        ttl: int = RESPONSE_CACHE_TTL,
+        embedding: Optional[bytes] = None,
+    ):
+        """Store the reply generated for a prompt.
+
+        Args:
+            assistant_id (str): Assistant the prompt was asked to.
+            prompt (str): Question asked by the user.
+            reply (str): Reply generated by the assistant.
+            ttl (int): Number of seconds the reply stays valid.
+            embedding (Optional[bytes]): Prompt embedding returned by get, computed
+                again when not given.
+        """
+        if embedding is None:
+            embedding = self._embed(prompt)
+        now = time.time()
+        with self._db_lock:
+            self.db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (assistant_id, self._hash(prompt), prompt, reply, embedding, now + ttl),
+            )
+            self.db.commit()
+
+    def invalidate(self, assistant_id: str):
+        """Drop every cached reply of an assistant.
+
+        Args:
+            assistant_id (str): Assistant whose replies should be removed.
+        """
+        with self._db_lock:
+            self.db.execute(
+                "DELETE FROM responses WHERE assistant_id = ?", (assistant_id,)
+            )
+            self.db.commit()
@@ -20,14 +20,16 @@ from utils import (
     scraping_status,
     session_manager,
     upload_pdf_to_vector_store,
-    convert_docx_to_pdf,
-    convert_markdown_to_pdf,
-    convert_markdown_to_pdf_vs,
+    convert_docx_to_pdf_async,
+    convert_markdown_to_pdf_async,
+    convert_markdown_to_pdf_vs_async,
     delete_assistant_and_vs,
     fetch_or_upload_logo,
+    remove_checkpoints,
     logger,
 )
-from openai import Client
+from cache import SemanticCache, RESPONSE_CACHE_TTL
+from openai import AsyncClient, Client
 from dotenv import load_dotenv
 from pocketbase.client import ClientResponseError, FileUpload
 from typing import Optional
@@ -53,6 +55,8 @@ os.makedirs(converted_pdfs_folder, exist_ok=True)
 
 
 ai = Client()
+ai_async = AsyncClient()
+response_cache = SemanticCache()
 total_scraped_companies = 0
 
 origins = [
@@ -83,13 +87,19 @@ def scrap_website_process(url, company_name, result_queue):
         )
 
         result_queue.put(("Completed", time_taken))
+    except asyncio.CancelledError:
+        logger.warning(f"Scraping {url} for {company_name} was terminated")
     except Exception as e:
         logger.error(f"Error scraping {url} for {company_name}: {e}")
         result_queue.put((f"Failed: {str(e)}", None))
 
 
 async def run_scraping_task(
-    company_name: str, websites: list[str], vector_store_id: str, timeout_seconds: int
+    company_name: str,
+    websites: list[str],
+    vector_store_id: str,
+    assistant_id: str,
+    timeout_seconds: int,
 ):
     global total_scraped_companies
     total_scraped_companies = 0
@@ -184,12 +194,13 @@ async def run_scraping_task(
 
     logger.info("Starting conversion of parsed report from markdown to PDF")
     input_dir = os.path.join("temp", "markdown")
-    scraped_pdfs_to_upload = []
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".md"):
-            input_path = os.path.join(input_dir, filename)
-            pdf_path = convert_markdown_to_pdf(input_path)
-            scraped_pdfs_to_upload.append(pdf_path)
+    scraped_pdfs_to_upload = await asyncio.gather(
+        *(
+            convert_markdown_to_pdf_async(os.path.join(input_dir, filename))
+            for filename in os.listdir(input_dir)
+            if filename.endswith(".md")
+        )
+    )
 
     if len(scraped_pdfs_to_upload) != 0:
         logger.info(
@@ -202,6 +213,13 @@ async def run_scraping_task(
             f"No PDF found from scrapped session, something went wrong.... Skipping upload"
         )
 
+    # The chat is offered while the reports are still being uploaded, drop the
+    # replies cached in the meantime since the knowledge base has now changed
+    try:
+        await asyncio.to_thread(response_cache.invalidate, assistant_id)
+    except Exception as e:
+        logger.error(f"Caught an exception while invalidating the response cache : {e}")
+
     for filename in os.listdir(input_dir):
         if filename.endswith(".md"):
             input_path = os.path.join(input_dir, filename)
@@ -212,20 +230,26 @@ async def run_scraping_task(
                 pass
 
 
-def process_files(file_paths: list[str]) -> list[str]:
+async def process_files(file_paths: list[str]) -> list[str]:
     """Process files and return converted PDF paths."""
     pdf_files = []
+    docx_files = []
     for path in file_paths:
         filename = os.path.splitext(os.path.basename(path))[0] + ".pdf"
         pdf_path = os.path.join(converted_pdfs_folder, filename)
         if path.endswith(".pdf"):
             pdf_files.append(path)
         elif path.endswith(".docx"):
-            convert_docx_to_pdf(path, pdf_path)
-            pdf_files.append(pdf_path)
+            docx_files.append(path)
         elif path.endswith(".md"):
-            convert_markdown_to_pdf_vs(path)
+            await convert_markdown_to_pdf_vs_async(path)
             pdf_files.append(pdf_path)
+
+    # Every DOCX shares a single LibreOffice start-up
+    if docx_files:
+        pdf_files.extend(
+            await convert_docx_to_pdf_async(docx_files, converted_pdfs_folder)
+        )
     return pdf_files
 
 
@@ -289,7 +313,7 @@ async def scrap(
     )
 
     logger.info("Converting attachments to PDF format")
-    pdf_files = process_files(pdf_files)
+    pdf_files = await process_files(pdf_files)
     if len(pdf_files) != 0:
         logger.info(f"Uploading attachments to vector store to ID {vector_store_id}")
         upload_pdf_to_vector_store(ai, vector_store_id, pdf_files)
@@ -328,6 +352,7 @@ async def scrap(
             company_name,
             websites_to_scrape,
             vector_store_id,
+            assistant_id,
             timeout_seconds,
         )
         logger.info("Sending scraping begun response to client")
@@ -406,15 +431,24 @@ async def get_all_companies():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.delete("/companies/{company_name}")
-async def delete_company(company_name: str):
+@app.delete("/companies/{company_name}", status_code=status.HTTP_202_ACCEPTED)
+async def delete_company(company_name: str, background_tasks: BackgroundTasks):
     try:
         companies = db.collection("companies").get_full_list()
         company = next((c for c in companies if c.company_name == company_name), None)
 
         if company:
-            # Delete the assistant and vector store associated with the company
-            delete_assistant_and_vs(ai, company.assistant_id, company.vector_store_id)
+            # Delete the assistant and vector store associated with the company once
+            # the response has been sent, the cache runs in the threadpool since
+            # SQLite blocks
+            background_tasks.add_task(
+                delete_assistant_and_vs,
+                ai_async,
+                company.assistant_id,
+                company.vector_store_id,
+            )
+            background_tasks.add_task(response_cache.invalidate, company.assistant_id)
+            remove_checkpoints(company.company_name)
 
             # Now delete the company from the database
             db.collection("companies").delete(company.id)
@@ -439,6 +473,8 @@ async def ask_query(
         assistant_id = value["assistant_id"]
         thread_id = value["thread_id"]
         vector_store_id = value["vector_store_id"]
+        cache_enabled = value["cache_enabled"]
+        cache_ttl = value["cache_ttl"]
 
     else:
         try:
@@ -448,15 +484,40 @@ async def ask_query(
             assistant_id = company.assistant_id
             vector_store_id = company.vector_store_id
             thread_id = ai.beta.threads.create().id
+            cache_enabled = not getattr(company, "disable_cache", False)
+            cache_ttl = getattr(company, "cache_ttl", 0) or RESPONSE_CACHE_TTL
             session_manager[key] = {
                 "assistant_id": assistant_id,
                 "vector_store_id": vector_store_id,
                 "thread_id": thread_id,
+                "cache_enabled": cache_enabled,
+                "cache_ttl": cache_ttl,
             }
         except Exception as e:
             return {"message": "Requested company not found!", "error": e}
 
+    # The cache only saves work, a failing lookup falls back to the assistant
+    cached_reply, embedding = None, None
+    if cache_enabled:
+        try:
+            cached_reply, embedding = await asyncio.to_thread(
+                response_cache.get, assistant_id, prompt
+            )
+        except Exception as e:
+            logger.error(f"Caught an exception while reading the response cache : {e}")
+
     try:
+        if cached_reply is not None:
+            logger.info(f"Cached Answer: {cached_reply}")
+            # Keep the thread history in sync for the follow-up questions
+            ai.beta.threads.messages.create(
+                thread_id=thread_id, role="user", content=prompt
+            )
+            ai.beta.threads.messages.create(
+                thread_id=thread_id, role="assistant", content=cached_reply
+            )
+            return {"answer": cached_reply}
+
         sentence_queue = Queue()
         buffer_dict = {"buffer": ""}
 
@@ -476,6 +537,20 @@ async def ask_query(
 
         assistant_reply = "".join(assistant_reply_parts)
         logger.info(f"Generated Answer: {assistant_reply}")
+        if cache_enabled and assistant_reply:
+            try:
+                await asyncio.to_thread(
+                    response_cache.put,
+                    assistant_id,
+                    prompt,
+                    assistant_reply,
+                    cache_ttl,
+                    embedding,
+                )
+            except Exception as e:
+                logger.error(
+                    f"Caught an exception while writing the response cache : {e}"
+                )
         return {"answer": assistant_reply}
 
     except Exception as e:
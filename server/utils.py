@@ -1,44 +1,135 @@
-from openai import Client
+from openai import AsyncClient, Client
 from markdown_pdf import MarkdownPdf, Section
 import os
+import io
+import asyncio
 import logging
+import atexit
+import queue
+import multiprocessing.util
 import subprocess
+import tempfile
+import json
+import signal
+import codecs
+import charset_normalizer
+import functools
+import shutil
+import math
 import openai
 from urllib.parse import urlparse, urlsplit, urljoin
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 import httpx
+import aiofiles
 from dotenv import load_dotenv
 import re
 import logging
-from docx2pdf import convert
 from icrawler.builtin import GoogleImageCrawler
+from logging.handlers import QueueHandler, QueueListener
+from aiolimiter import AsyncLimiter
+from collections import defaultdict
+from contextlib import asynccontextmanager
 from typing import Optional
+from dataclasses import dataclass, field
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from fastapi import UploadFile
 from pocketbase.client import FileUpload
 
 load_dotenv()
 
+# Working directories, resolved once at import
+_CWD = os.getcwd()
+_LOGS_DIR = os.path.join(_CWD, "logs")
+_TEMP_MD = os.path.join(_CWD, "temp", "markdown")
+_TEMP_ATTACHMENTS = os.path.join(_CWD, "temp", "attachments")
+_TEMP_PDF = os.path.join(_CWD, "temp", "pdf")
+_TEMP_CHECKPOINTS = os.path.join(_CWD, "temp", "checkpoints")
+
 attachment_extensions = ["pdf", "doc", "docx", "xls", "xlsx", "ppt", "pptx"]
+attachment_content_types = {
+    "application/pdf": "pdf",
+    "application/msword": "doc",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "application/vnd.ms-excel": "xls",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+    "application/vnd.ms-powerpoint": "ppt",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": "pptx",
+}
+_ATTACH_SUFFIXES = tuple("." + ext.lower() for ext in attachment_extensions)
+
+# Crawler, concurrency and rate limits (requests per second) apply per domain.
+CRAWL_WORKERS = 10
+CRAWL_CONCURRENCY = 5
+CRAWL_RATE_LIMIT = 5
+CRAWL_CHECKPOINT_INTERVAL = 50
+
+# Matches OpenAI file citation markers such as 【4:0†source】, including an
+# unterminated marker at the end of a delta
+_CITATION_RE = re.compile(r"【[^】]*(?:】|$)")
+_SENTENCE_RE = re.compile(r"[^.!?]*[.!?]")
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([\w.:-]+)""", re.I)
+
+# PDF conversions are CPU bound, keep them off the event loop
+_conversion_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+# Vector store uploads
+UPLOAD_BATCH_SIZE = 20
+UPLOAD_WORKERS = 4
 
 # Local Cache
-markdown_files = []
-attachment_files = []
 scraping_status = dict()
 session_manager = dict()
 
 
+@dataclass
+class ScrapeState:
+    """Files produced by a single scraping session."""
+
+    markdown_files: set[str] = field(default_factory=set)
+    attachment_files: set[str] = field(default_factory=set)
+    report_handles: dict[str, io.TextIOWrapper] = field(default_factory=dict)
+
+
+def start_log_listener(queue_handler: QueueHandler, handler: logging.Handler):
+    """Give queue_handler a fresh queue drained by a background thread into handler,
+    so that logging calls never block on disk writes.
+
+    Args:
+        queue_handler (QueueHandler): Handler attached to the logger.
+        handler (logging.Handler): Handler actually writing the records.
+
+    Returns:
+        QueueListener: The started listener, stop it to flush pending records.
+    """
+    queue_handler.queue = queue.SimpleQueue()
+    listener = QueueListener(queue_handler.queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
 def create_logger():
-    logs_folder = os.path.join(os.getcwd(), "logs")
-    os.makedirs(logs_folder, exist_ok=True)
+    os.makedirs(_LOGS_DIR, exist_ok=True)
     logger = logging.getLogger(__name__)
     logger.setLevel(logging.INFO)
     formatter = logging.Formatter(
         "%(asctime)s | %(levelname)s | %(process)d | %(message)s"
     )
-    file_handler = logging.FileHandler(os.path.join(os.getcwd(), "logs", "session.log"))
+    file_handler = logging.FileHandler(os.path.join(_LOGS_DIR, "session.log"))
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    queue_handler = QueueHandler(None)
+    listener = start_log_listener(queue_handler, file_handler)
+    atexit.register(listener.stop)
+    # Scraping runs in forked processes, which inherit the queue but not the listener
+    # thread, so each of them starts its own listener and flushes it when exiting
+    multiprocessing.util.register_after_fork(
+        queue_handler,
+        lambda handler: multiprocessing.util.Finalize(
+            handler, start_log_listener(handler, file_handler).stop, exitpriority=10
+        ),
+    )
+    logger.addHandler(queue_handler)
     logger.propagate = False
     return logger
 
@@ -52,9 +143,6 @@ async def fetch_or_upload_logo(
     """
     Handle logo retrieval. If logo is provided, upload it; otherwise, crawl Google Images.
     """
-    google_crawler = GoogleImageCrawler(
-        storage={"root_dir": os.path.join(os.getcwd(), "temp", "images")}
-    )
     if logo:
         logo_binary = await logo.read()
         return FileUpload(logo.filename, logo_binary)
@@ -62,13 +150,16 @@ async def fetch_or_upload_logo(
     logger.info(
         f"Attempting to retrieve logo for {company_name.replace('_', ' ')} from Google Images"
     )
-    crawled_logo_path = None
+    # A fresh directory per call so images left over from earlier crawls are never picked up
+    images_dir = tempfile.mkdtemp(prefix="logo_")
     try:
-        google_crawler.crawl(
-            keyword=f"{company_name.replace('_', ' ')} Company Logo", max_num=1
+        google_crawler = GoogleImageCrawler(storage={"root_dir": images_dir})
+        await asyncio.to_thread(
+            google_crawler.crawl,
+            keyword=f"{company_name.replace('_', ' ')} Company Logo",
+            max_num=1,
         )
 
-        images_dir = os.path.join(os.getcwd(), "temp", "images")
         crawled_files = os.listdir(images_dir)
         if crawled_files:
             crawled_logo_path = os.path.join(images_dir, crawled_files[0])
@@ -85,9 +176,8 @@ async def fetch_or_upload_logo(
         )
         return None
     finally:
-        if crawled_logo_path and os.path.exists(crawled_logo_path):
-            logger.info("Removing crawled logo from images directory")
-            os.remove(crawled_logo_path)
+        logger.info("Removing crawled logo from images directory")
+        shutil.rmtree(images_dir, ignore_errors=True)
 
 
 def create_vector_store(client: Client, company_name: str):
@@ -126,98 +216,134 @@ def create_assistant(
     return assistant.id
 
 
-def delete_assistant_and_vs(client: Client, assistant_id: str, vector_store_id: str):
-    """Delete the assistant and its corresponding vector store.
+async def delete_assistant_and_vs(
+    client: AsyncClient, assistant_id: str, vector_store_id: str
+):
+    """Delete the assistant and its corresponding vector store concurrently.
 
     Args:
-        client (Client): OpenAI Client
+        client (AsyncClient): Async OpenAI Client
         assistant_id (str): ID of the assistant to delete
         vector_store_id (str): ID of the vector store to delete
 
     Returns:
-        dict: Confirmation message for deletion
+        None
     """
-    try:
-        # Delete the assistant
-        client.beta.assistants.delete(assistant_id)
+    assistant_result, vector_store_result = await asyncio.gather(
+        client.beta.assistants.delete(assistant_id),
+        client.beta.vector_stores.delete(vector_store_id),
+        return_exceptions=True,
+    )
+
+    if isinstance(assistant_result, Exception):
+        logger.error(f"Error deleting assistant {assistant_id}: {assistant_result}")
+    else:
         logger.info(f"Assistant with ID {assistant_id} deleted.")
 
-        # Delete the vector store
-        client.beta.vector_stores.delete(vector_store_id)
+    if isinstance(vector_store_result, Exception):
+        logger.error(
+            f"Error deleting vector store {vector_store_id}: {vector_store_result}"
+        )
+    else:
         logger.info(f"Vector store with ID {vector_store_id} deleted.")
 
-        return {"detail": "Assistant and vector store successfully deleted."}
-
-    except Exception as e:
-        logger.error(f"Error deleting assistant or vector store: {str(e)}")
-        return {
-            "detail": "Something went wrong when deleting vector store and assistant"
-        }
 
-
-def save_extensions(
-    url: str, content: bytes, folder: str, extensions: list[str], company_name: str
+async def save_extensions(
+    url: str,
+    response: httpx.Response,
+    folder: str,
+    extensions: list[str],
+    company_name: str,
+    state: ScrapeState,
 ):
-    """Saves content to a file if the URL's extension is in the specified list.
+    """Streams a response body to a file if the URL's extension, or otherwise the
+    extension matching its content type, is in the specified list.
 
     Args:
         url (str): The URL of the file.
-        content (bytes): The content to save.
+        response (httpx.Response): The streamed response whose body will be saved.
         folder (str): The folder where the file will be saved.
         extensions (list[str]): List of allowed file extensions.
         company_name (str): The company name for folder organization.
+        state (ScrapeState): Scraping session the saved file is recorded in.
 
     Returns:
         None
     """
 
-    folder_dir = os.path.join(os.getcwd(), folder, company_name)
+    folder_dir = os.path.join(_CWD, folder, company_name)
     os.makedirs(folder_dir, exist_ok=True)
 
-    file_extension = url.split(".")[-1].lower()
+    url_path = urlparse(url).path
+    file_name = os.path.basename(url_path)
+    file_extension = os.path.splitext(url_path)[1][1:].lower()
+    if file_extension not in extensions:
+        content_type = response.headers.get("Content-Type", "").split(";")[0]
+        file_extension = attachment_content_types.get(content_type.strip().lower())
+        file_name = f"{file_name or 'attachment'}.{file_extension}"
+
     if file_extension in extensions:
-        file_name = url.split("/")[-1]
-        file_path = os.path.join(folder_dir, file_name)
-
-        if os.path.exists(file_path):
-            base_name, ext = os.path.splitext(file_name)
-            counter = 1
-            while os.path.exists(file_path):
-                file_path = os.path.join(folder_dir, f"{base_name}_{counter}{ext}")
+        # O_EXCL claims the name atomically, so concurrent workers saving files
+        # with the same name cannot overwrite each other
+        base_name, ext = os.path.splitext(file_name)
+        counter = 0
+        while True:
+            file_path = os.path.join(
+                folder_dir,
+                file_name if counter == 0 else f"{base_name}_{counter}{ext}",
+            )
+            try:
+                fd = os.open(
+                    file_path,
+                    os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0),
+                    0o644,
+                )
+                break
+            except FileExistsError:
                 counter += 1
 
-        with open(file_path, "wb") as file:
-            file.write(content)
+        # Remove partial downloads, including on cancellation, so a truncated
+        # file never ends up in the attachments
+        try:
+            async with aiofiles.open(fd, "wb") as file:
+                async for chunk in response.aiter_bytes():
+                    await file.write(chunk)
+        except BaseException:
+            os.unlink(file_path)
+            raise
 
-        attachment_files.append(file_path)
-    logger.info(f"Saved the following attachements: {attachment_files}")
+        state.attachment_files.add(file_path)
+        logger.info(f"Saved attachment: {file_path}")
 
 
-def generate_page_report(url: str, content: bytes, company_name: str):
+def generate_page_report(
+    url: str, tree: LexborHTMLParser, company_name: str, state: ScrapeState
+):
     """Generates a Markdown report from webpage content.
 
     Args:
         url (str): The webpage URL.
-        content (bytes): HTML content of the webpage.
+        tree (LexborHTMLParser): Parsed HTML content of the webpage.
         company_name (str): The company name for report organization.
+        state (ScrapeState): Scraping session the report is recorded in.
 
     Returns:
         None
     """
 
-    soup = BeautifulSoup(content, "lxml")
+    title_node = tree.css_first("title")
     title = (
-        soup.title.string.strip()
-        if soup.title and soup.title.string
+        title_node.text(strip=True)
+        if title_node and title_node.text(strip=True)
         else "No Title Found"
     )
-    description_meta = soup.find("meta", attrs={"name": "description"})
+    description_meta = tree.css_first('meta[name="description"]')
     description = (
-        description_meta["content"].strip()
-        if description_meta and description_meta.get("content")
+        description_meta.attributes["content"].strip()
+        if description_meta and description_meta.attributes.get("content")
         else "No Description Found"
     )
-    body_text = "\n".join([p.get_text(strip=True) for p in soup.find_all("p")])
+    body_text = "\n".join([p.text(strip=True) for p in tree.css("p")])
 
     report_content = f"""# {title}
 
@@ -242,35 +368,138 @@ def generate_page_report(url: str, content: bytes, company_name: str):
         if len(url_domain.split(".")) > 2
         else url_domain.split(".")[0]
     )
-    reports_dir = os.path.join(os.getcwd(), "temp", "markdown")
-    os.makedirs(reports_dir, exist_ok=True)
-
     report_filename_md = f"{domain_name}.md"
-    report_filepath_md = os.path.join(reports_dir, report_filename_md)
-
-    with open(
-        report_filepath_md, "a", encoding="utf-8", errors="ignore"
-    ) as report_file:
-        report_file.write(report_content)
+    report_filepath_md = os.path.join(_TEMP_MD, report_filename_md)
+
+    # Reports are appended to once per page, keep the handle open with a large
+    # buffer so the writes coalesce until close_report_handles is called
+    report_file = state.report_handles.get(report_filepath_md)
+    if report_file is None:
+        os.makedirs(_TEMP_MD, exist_ok=True)
+        report_file = open(
+            report_filepath_md,
+            "a",
+            encoding="utf-8",
+            errors="ignore",
+            buffering=1024 * 1024,
+        )
+        state.report_handles[report_filepath_md] = report_file
+    report_file.write(report_content)
 
-    if report_filepath_md not in markdown_files:
-        markdown_files.append(report_filepath_md)
+    state.markdown_files.add(report_filepath_md)
 
     logger.info(f"Markdown Report Generated for {url}")
 
 
-def scrape_entire_website(
-    start_url: str, company_name: str, max_pages: int = 1000
+def close_report_handles(state: ScrapeState):
+    """Flush and close every Markdown report opened by generate_page_report.
+
+    Args:
+        state (ScrapeState): Scraping session whose reports should be closed.
+
+    Returns:
+        None
+    """
+    for report_file in state.report_handles.values():
+        report_file.close()
+    state.report_handles.clear()
+
+
+def get_checkpoint_path(company_name: str, domain: str) -> str:
+    """Path of the crawl checkpoint of a company's website.
+
+    Args:
+        company_name (str): The name of the company being scraped.
+        domain (str): Domain of the website being scraped.
+
+    Returns:
+        str: Path of the JSON checkpoint file.
+    """
+    return os.path.join(
+        _TEMP_CHECKPOINTS, company_name, f"{domain.replace(':', '_')}.json"
+    )
+
+
+def remove_checkpoints(company_name: str):
+    """Remove every crawl checkpoint left behind for a company.
+
+    Args:
+        company_name (str): The name of the company whose checkpoints are removed.
+    """
+    shutil.rmtree(
+        os.path.join(_TEMP_CHECKPOINTS, company_name),
+        ignore_errors=True,
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def get_netloc(url: str) -> str:
+    """Cached lowercased netloc of a URL, the crawler parses the same links many
+    times over.
+
+    Args:
+        url (str): The URL to parse.
+
+    Returns:
+        str: Lowercased network location of the URL.
+    """
+    return urlparse(url).netloc.lower()
+
+
+def detect_encoding(content: bytes) -> str:
+    """Encoding of a response that does not declare one in its Content-Type header,
+    taken from the page's <meta charset> or detected from the bytes.
+
+    Args:
+        content (bytes): Raw response body.
+
+    Returns:
+        str: Name of the encoding to decode the body with.
+    """
+    match = _META_CHARSET_RE.search(content[:2048])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    best_match = charset_normalizer.from_bytes(content).best()
+    return best_match.encoding if best_match else "utf-8"
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP client shared by every request of a crawl.
+
+    Returns:
+        httpx.AsyncClient: Client with keep-alive pooling and HTTP/2 enabled.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(5.0),
+        http2=True,
+        verify=False,
+        follow_redirects=True,
+        default_encoding=detect_encoding,
+    )
+
+
+async def scrape_entire_website(
+    start_url: str, company_name: str, state: ScrapeState, max_pages: int = 1000
 ) -> None:
     """
     Scrapes a website starting from the given URL.
 
-    Iteratively fetches pages and saves attachments if their URLs match specified extensions.
+    Fetches pages concurrently with a pool of workers sharing one HTTP client and
+    saves attachments if their URLs match specified extensions.
     Generates a report for HTML content found on the pages.
 
+    Requests are rate limited per domain, and progress is checkpointed every
+    CRAWL_CHECKPOINT_INTERVAL pages so re-running an interrupted crawl resumes where
+    it stopped.
+
     Args:
         start_url (str): The starting URL for scraping.
         company_name (str): The name of the company for organizing reports.
+        state (ScrapeState): Scraping session the generated files are recorded in.
         max_pages (int, optional): Maximum number of pages to scrape. Defaults to 250.
     """
     if not start_url:
@@ -282,68 +511,182 @@ def scrape_entire_website(
     if not isinstance(max_pages, int) or max_pages <= 0:
         raise ValueError("Max iterations must be a positive integer")
 
-    base_domain = urlparse(start_url).netloc
+    base_domain = get_netloc(start_url)
     scraped_urls = set()
-    urls_to_scrape = [start_url]
+    frontier = [start_url]
+
+    checkpoint_path = get_checkpoint_path(company_name, base_domain)
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        scraped_urls.update(checkpoint["scraped"])
+        frontier = checkpoint["frontier"]
+        logger.info(
+            f"Resuming scraping of {start_url} from checkpoint with {len(scraped_urls)} pages already scraped"
+        )
 
-    while urls_to_scrape and len(scraped_urls) < max_pages:
-        url = urls_to_scrape.pop(0)
+    enqueued = scraped_urls | set(frontier)
+    urls_to_scrape = asyncio.Queue()
+    for url in frontier:
+        urls_to_scrape.put_nowait(url)
+
+    semaphores = defaultdict(lambda: asyncio.Semaphore(CRAWL_CONCURRENCY))
+    rate_limiters = defaultdict(lambda: AsyncLimiter(CRAWL_RATE_LIMIT, 1))
+
+    @asynccontextmanager
+    async def throttle(url: str):
+        domain = get_netloc(url)
+        async with semaphores[domain], rate_limiters[domain]:
+            yield
+
+    def save_checkpoint():
+        # Flush the reports first so every page recorded as scraped is on disk
+        for report_file in state.report_handles.values():
+            report_file.flush()
+
+        os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+        with open(f"{checkpoint_path}.tmp", "w", encoding="utf-8") as checkpoint_file:
+            json.dump(
+                {
+                    "scraped": list(scraped_urls),
+                    "frontier": list(enqueued - scraped_urls),
+                },
+                checkpoint_file,
+            )
+        os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
+
+    last_checkpoint = len(scraped_urls)
+
+    async def crawl_worker(client: httpx.AsyncClient):
+        nonlocal last_checkpoint
+        while True:
+            url = await urls_to_scrape.get()
+            try:
+                await scrape_page(client, url)
+                # Checkpoint between pages so every scraped page has its links queued
+                if len(scraped_urls) - last_checkpoint >= CRAWL_CHECKPOINT_INTERVAL:
+                    last_checkpoint = len(scraped_urls)
+                    save_checkpoint()
+            except Exception as e:
+                logger.error(f"Unexpected error while scraping {url} : {e}")
+            finally:
+                urls_to_scrape.task_done()
+
+    async def scrape_page(client: httpx.AsyncClient, url: str):
         if not url:
             logger.warning(f"Skipping null URL")
-            continue
+            return
 
-        if url in scraped_urls:
-            continue
+        if url in scraped_urls or len(scraped_urls) >= max_pages:
+            return
 
+        url_lc = url.lower()
         try:
-            response = httpx.get(url, verify=False, timeout=5)
-            response.raise_for_status()
+            async with throttle(url):
+                async with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    final_url = str(response.url)
+
+                    # Decide from the headers before the body is read so bodies
+                    # that would be discarded are never downloaded
+                    content_type = response.headers.get("Content-Type", "").lower()
+                    if (
+                        url_lc.endswith(_ATTACH_SUFFIXES)
+                        or content_type.split(";")[0].strip()
+                        in attachment_content_types
+                    ):
+                        scraped_urls.add(url)
+                        try:
+                            await save_extensions(
+                                url,
+                                response,
+                                _TEMP_ATTACHMENTS,
+                                attachment_extensions,
+                                company_name,
+                                state,
+                            )
+                        except BaseException:
+                            # Keep the URL in the checkpoint frontier so a re-run retries it
+                            scraped_urls.discard(url)
+                            raise
+                        return
+
+                    if "text/html" not in content_type:
+                        logger.debug(
+                            f"Invalid page response: {content_type}, skipping this URL"
+                        )
+                        return
+
+                    if get_netloc(final_url) != base_domain:
+                        logger.debug(
+                            f"{url} redirected to {final_url} outside of {base_domain}, skipping this URL"
+                        )
+                        return
+
+                    # A redirect target may be crawled under its own URL too, claim
+                    # both before reading the body so the page is reported once
+                    if final_url in scraped_urls:
+                        logger.debug(
+                            f"{url} redirected to already scraped {final_url}, skipping this URL"
+                        )
+                        return
+                    scraped_urls.add(url)
+                    scraped_urls.add(final_url)
+                    enqueued.add(final_url)
+
+                    await response.aread()
         except (httpx.RequestError, httpx.HTTPError) as e:
             logger.error(f"Got an error while scraping {start_url} : {e}")
-            continue
-
-        if not response:
-            logger.warning(f"Skipping empty response for {url}")
-            continue
-
-        scraped_urls.add(url)
-
-        content_type = response.headers.get("Content-Type", "").lower()
-        if any(url.lower().endswith(f".{ext}") for ext in attachment_extensions):
-            save_extensions(
-                url,
-                response.content,
-                os.path.join(os.getcwd(), "temp", "attachments"),
-                attachment_extensions,
-                company_name,
-            )
-            continue
+            return
+
+        # Parse the decoded text, Lexbor expects valid UTF-8 and httpx already
+        # decodes the body using the declared or detected charset
+        tree = LexborHTMLParser(response.text)
+        generate_page_report(url, tree, company_name, state)
+
+        for a in tree.css("a[href]"):
+            href = a.attributes.get("href")
+            if not href:
+                continue
+            joined_url = urljoin(final_url, href)
+            if joined_url not in enqueued and get_netloc(joined_url) == base_domain:
+                enqueued.add(joined_url)
+                urls_to_scrape.put_nowait(joined_url)
+
+    # Crawls that hit the timeout are stopped with SIGTERM, cancel the crawl so it
+    # can checkpoint and the caller can flush the reports before the process exits
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, asyncio.current_task().cancel
+        )
+    except NotImplementedError:
+        pass  # Signal handlers are not supported by the Windows event loops
 
-        if "text/html" not in content_type:
-            logger.debug(f"Invalid page response: {content_type}, skipping this URL")
-            continue
-        else:
-            generate_page_report(url, response.content, company_name)
-
-        soup = BeautifulSoup(response.content, "lxml")
-        new_urls = set()
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            joined_url = urljoin(url, href)
-            parsed_joined_url = urlparse(joined_url)
-
-            if (
-                parsed_joined_url.netloc == base_domain
-                and joined_url not in scraped_urls
-                and joined_url not in urls_to_scrape
-            ):
-                new_urls.add(joined_url)
-        urls_to_scrape.extend(new_urls)
-
-
-def convert_markdown_to_pdf(
-    path: str, output_dir: str = os.path.join(os.getcwd(), "temp", "pdf")
-):
+    try:
+        async with create_http_client() as client:
+            workers = [
+                asyncio.create_task(crawl_worker(client)) for _ in range(CRAWL_WORKERS)
+            ]
+            try:
+                await urls_to_scrape.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+    except asyncio.CancelledError:
+        # Checkpoint once the workers have stopped so pages interrupted mid-way
+        # are left in the frontier
+        logger.warning(
+            f"Scraping of {start_url} was cancelled after {len(scraped_urls)} pages"
+        )
+        save_checkpoint()
+        raise
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+def convert_markdown_to_pdf(path: str, output_dir: str = _TEMP_PDF):
     """
     Convert a Markdown file to PDF format with a Table of Contents and CSS styling.
 
@@ -371,55 +714,98 @@ def convert_markdown_to_pdf(
     return output_path
 
 
-def convert_attachments_to_pdf():
+def run_libreoffice(output_dir: str, file_paths: list[str]):
+    """
+    Convert a batch of documents to PDF with a single LibreOffice invocation.
+
+    Every batch gets its own temporary LibreOffice profile so that concurrent
+    instances do not contend for the same profile lock, the profile is removed
+    once the batch is converted.
+
+    Args:
+        output_dir (str): Directory where the generated PDF files will be saved.
+        file_paths (list[str]): Documents to convert.
+
+    Returns:
+        tuple: A tuple containing:
+            - int: Return code of LibreOffice.
+            - str: Error output of LibreOffice.
+    """
+    with tempfile.TemporaryDirectory(
+        prefix="lo_", ignore_cleanup_errors=True
+    ) as profile_dir:
+        result = subprocess.run(
+            [
+                "libreoffice",
+                "--headless",
+                f"-env:UserInstallation={Path(profile_dir).as_uri()}",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                output_dir,
+                *file_paths,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30 * len(file_paths),
+        )
+    return result.returncode, result.stderr.decode()
+
+
+def convert_attachments_to_pdf(state: ScrapeState):
     """
     Convert various attachment files (DOC, DOCX, PPT, PPTX) to PDF format.
 
         This function processes a set of attachment file paths, converting supported
-        file types to PDF using LibreOffice. If a file is already in PDF format,
-        it logs this information. Unsupported file types are also logged.
+        file types to PDF using LibreOffice. Files sharing a directory are converted
+        in batches so LibreOffice only starts once per batch, and batches run in
+        parallel. If a file is already in PDF format, it logs this information.
+        Unsupported file types are also logged.
 
         Args:
-            None
+            state (ScrapeState): Scraping session whose attachments are converted.
 
         Returns:
             None
     """
-    for file_path in set(attachment_files):
-        try:
-            file_extension = file_path.split(".")[-1].lower()
-            pdf_file_path = file_path.rsplit(".", 1)[0] + ".pdf"
-
-            if file_extension in ["doc", "docx", "pptx", "ppt"]:
-                result = subprocess.run(
-                    [
-                        "libreoffice",
-                        "--headless",
-                        "--convert-to",
-                        "pdf",
-                        "--outdir",
-                        os.path.dirname(file_path),
-                        file_path,
-                    ],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    timeout=30,
-                )
-                if result.returncode == 0:
+    batches = dict()
+    for file_path in state.attachment_files:
+        file_extension = file_path.split(".")[-1].lower()
+        if file_extension in ["doc", "docx", "pptx", "ppt"]:
+            batches.setdefault(os.path.dirname(file_path), []).append(file_path)
+        elif file_extension == "pdf":
+            logger.info(f"Attachment {file_path} is already a PDF.")
+        else:
+            logger.warning(f"Cannot convert {file_path} to PDF. Unsupported file type.")
+
+    if not batches:
+        return
+
+    max_workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict()
+        for output_dir, file_paths in batches.items():
+            batch_size = math.ceil(len(file_paths) / max_workers)
+            for i in range(0, len(file_paths), batch_size):
+                batch = file_paths[i : i + batch_size]
+                futures[executor.submit(run_libreoffice, output_dir, batch)] = batch
+
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                returncode, stderr = future.result()
+            except Exception as e:
+                logger.error(f"Error converting attachments {batch} to PDF: {e}")
+                continue
+
+            for file_path in batch:
+                pdf_file_path = file_path.rsplit(".", 1)[0] + ".pdf"
+                if returncode == 0 and os.path.exists(pdf_file_path):
                     logger.info(f"Converted {file_path} to PDF at {pdf_file_path}")
                 else:
                     logger.error(
-                        f"Failed to convert {file_path} to PDF. LibreOffice error: {result.stderr.decode()}"
+                        f"Failed to convert {file_path} to PDF. LibreOffice error: {stderr}"
                     )
-            elif file_extension == "pdf":
-                logger.info(f"Attachment {file_path} is already a PDF.")
-            else:
-                logger.warning(
-                    f"Cannot convert {file_path} to PDF. Unsupported file type."
-                )
-
-        except Exception as e:
-            logger.error(f"Error converting attachment {file_path} to PDF: {e}")
 
 
 def scrap_website(company_url: str, company_name: str):
@@ -432,8 +818,13 @@ def scrap_website(company_url: str, company_name: str):
     Returns:
         None
     """
-    scrape_entire_website(company_url, company_name)
+    state = ScrapeState()
+    try:
+        asyncio.run(scrape_entire_website(company_url, company_name, state))
+    finally:
+        close_report_handles(state)
 
+    logger.info(f"Total attachments saved: {len(state.attachment_files)}")
     logging.info("Scraping completed.")
     logging.info("All conversions completed.")
 
@@ -464,11 +855,14 @@ def extract_sentences(text):
             - list: A list of sentences ending with '.', '!', or '?'.
             - str: Remaining text that does not end with '.', '!', or '?'.
     """
-    sentence_end_pattern = re.compile(r"([^.!?]*[.!?])", re.M)
-    sentences = sentence_end_pattern.findall(text)
-    buffer = sentence_end_pattern.sub("", text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-    buffer = buffer.strip()
+    sentences = []
+    end = 0
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = match.group().strip()
+        if sentence:
+            sentences.append(sentence)
+        end = match.end()
+    buffer = text[end:].strip()
     return sentences, buffer
 
 
@@ -493,16 +887,7 @@ def process_stream_event(event, assistant_reply_parts, sentence_queue, buffer_di
             openai.types.beta.threads.text_delta_block.TextDeltaBlock,
         ):
             new_content = event.data.delta.content[0].text.value
-            cleaned_text = ""
-            i = 0
-            while i < len(new_content):
-                if new_content[i] != "【":
-                    cleaned_text += new_content[i]
-                elif new_content[i] == "【":
-                    i += 1
-                    while i < len(new_content) and new_content[i] != "】":
-                        i += 1
-                i += 1
+            cleaned_text = _CITATION_RE.sub("", new_content)
 
             if cleaned_text:
                 assistant_reply_parts.append(cleaned_text)
@@ -514,25 +899,35 @@ def process_stream_event(event, assistant_reply_parts, sentence_queue, buffer_di
                     sentence_queue.put(sentence)
 
 
-def upload_pdf_to_vector_store(
+def upload_pdf_batch_to_vector_store(
     client: Client, vector_store_id: str, pdf_files: list[str]
 ):
     """
-    Uploads a PDF file to a specified vector store.
+    Uploads one batch of PDF files to a specified vector store, keeping the file
+    handles open only for the duration of the batch.
 
     Args:
         client (Client): Client instance for interacting with the vector store service.
         vector_store_id (str): Unique identifier of the target vector store.
         pdf_files (list): List of pdf_files path.
     """
-    file_streams = [open(pdf_path, "rb") for pdf_path in pdf_files]
+    file_streams = []
     try:
+        # A file that cannot be opened is skipped instead of failing its batch
+        for pdf_path in pdf_files:
+            try:
+                file_streams.append(open(pdf_path, "rb"))
+            except OSError as e:
+                logger.error(f"Skipping {pdf_path}, could not open it for upload : {e}")
+        if not file_streams:
+            return
+
         client.beta.vector_stores.file_batches.upload_and_poll(
             vector_store_id=vector_store_id, files=file_streams
         )
 
         logger.info(
-            f"{pdf_files} got uploded to vector store with id {vector_store_id}"
+            f"{[stream.name for stream in file_streams]} got uploded to vector store with id {vector_store_id}"
         )
     except Exception as e:
         logger.error(f"Caught an exception while uploading pdf to vector store : {e}")
@@ -541,9 +936,68 @@ def upload_pdf_to_vector_store(
             stream.close()
 
 
-def convert_docx_to_pdf(docx_path: str, pdf_path: str):
-    """Convert DOCX to PDF."""
-    convert(docx_path, pdf_path)
+def upload_pdf_to_vector_store(
+    client: Client, vector_store_id: str, pdf_files: list[str]
+):
+    """
+    Uploads PDF files to a specified vector store in concurrent batches of
+    UPLOAD_BATCH_SIZE files.
+
+    Args:
+        client (Client): Client instance for interacting with the vector store service.
+        vector_store_id (str): Unique identifier of the target vector store.
+        pdf_files (list): List of pdf_files path.
+    """
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        futures = [
+            executor.submit(
+                upload_pdf_batch_to_vector_store,
+                client,
+                vector_store_id,
+                pdf_files[i : i + UPLOAD_BATCH_SIZE],
+            )
+            for i in range(0, len(pdf_files), UPLOAD_BATCH_SIZE)
+        ]
+        for future in as_completed(futures):
+            if future.exception():
+                logger.error(
+                    f"Caught an exception while uploading pdf to vector store : {future.exception()}"
+                )
+
+
+def convert_docx_to_pdf(docx_paths: list[str], output_dir: str) -> list[str]:
+    """
+    Convert DOCX files to PDF with a single LibreOffice invocation.
+
+    Args:
+        docx_paths (list[str]): Paths of the DOCX files to convert.
+        output_dir (str): Directory where the generated PDF files will be saved.
+
+    Returns:
+        list[str]: Paths of the PDF files that were generated.
+    """
+    # A missing or hung LibreOffice must not fail the request, only the PDFs that
+    # were actually produced are returned
+    try:
+        returncode, stderr = run_libreoffice(output_dir, docx_paths)
+        if returncode != 0:
+            logger.error(
+                f"Failed to convert {docx_paths} to PDF. LibreOffice error: {stderr}"
+            )
+    except Exception as e:
+        logger.error(f"Error converting {docx_paths} to PDF: {e}")
+
+    pdf_paths = []
+    for docx_path in docx_paths:
+        pdf_path = os.path.join(
+            output_dir, os.path.splitext(os.path.basename(docx_path))[0] + ".pdf"
+        )
+        if os.path.exists(pdf_path):
+            logger.info(f"Converted {docx_path} to PDF at {pdf_path}")
+            pdf_paths.append(pdf_path)
+        else:
+            logger.error(f"Failed to convert {docx_path} to PDF")
+    return pdf_paths
 
 
 def convert_markdown_to_pdf_vs(path: str, output_dir: str = "converted_pdfs/"):
@@ -572,5 +1026,31 @@ def convert_markdown_to_pdf_vs(path: str, output_dir: str = "converted_pdfs/"):
     pdf.save(output_path)
 
 
+async def convert_markdown_to_pdf_async(path: str, output_dir: str = _TEMP_PDF):
+    """Run convert_markdown_to_pdf on the conversion process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _conversion_pool, convert_markdown_to_pdf, path, output_dir
+    )
+
+
+async def convert_markdown_to_pdf_vs_async(
+    path: str, output_dir: str = "converted_pdfs/"
+):
+    """Run convert_markdown_to_pdf_vs on the conversion process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _conversion_pool, convert_markdown_to_pdf_vs, path, output_dir
+    )
+
+
+async def convert_docx_to_pdf_async(docx_paths: list[str], output_dir: str):
+    """Run convert_docx_to_pdf on the conversion process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _conversion_pool, convert_docx_to_pdf, docx_paths, output_dir
+    )
+
+
 if __name__ == "__main__":
     scrap_website("http://www.example.com", "Example")